@@ -0,0 +1,207 @@
+import json
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from PIL import Image
+from tqdm import tqdm
+
+ATLAS_MAGIC = b"NFTATLS1"
+ATLAS_ALIGNMENT = 64
+CANVAS_SIZE = (960, 960)
+
+
+def layer_key(trait_type, name):
+    return f"{trait_type}/{name}"
+
+
+def source_stamp(layer_path):
+    """(mtime, size) of a source PNG, recorded in the atlas to detect edits after compiling"""
+    stat = os.stat(layer_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def inspect_layer(trait_type, name, traits_dir="traits"):
+    """Decode one trait layer, check it and return its cropped RGBA pixels"""
+    layer_path = Path(traits_dir) / trait_type / f"{name}.png"
+    result = {"trait_type": trait_type, "name": name, "errors": [], "warnings": []}
+
+    if not layer_path.exists():
+        result["errors"].append(f"{layer_path} (Missing file)")
+        return result
+
+    try:
+        result["source"] = source_stamp(layer_path)
+        with Image.open(layer_path) as image:
+            image.load()
+            if image.size != CANVAS_SIZE:
+                result["errors"].append(f"{layer_path} (Size {image.size[0]}x{image.size[1]}, expected {CANVAS_SIZE[0]}x{CANVAS_SIZE[1]})")
+            if image.mode != "RGBA":
+                result["errors"].append(f"{layer_path} (Mode {image.mode}, expected RGBA)")
+            if result["errors"]:
+                return result
+
+            bbox = image.getchannel("A").getbbox()
+            if bbox is None:
+                result["warnings"].append(f"{layer_path} (Fully transparent)")
+                bbox = (0, 0, 0, 0)
+            result["bbox"] = list(bbox)
+            result["pixels"] = image.crop(bbox).tobytes() if bbox[2] > bbox[0] else b""
+    except Exception as e:
+        result["errors"].append(f"{layer_path} (Error: {str(e)})")
+
+    return result
+
+
+def validate_assets(config, traits_dir="traits", workers=None):
+    """Check every layer referenced by config against traits_dir in parallel"""
+    jobs = [
+        (trait_type, option["name"])
+        for trait_type in config["trait_order"]
+        for option in config["traits"][trait_type]["options"]
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(inspect_layer, trait_type, name, traits_dir) for trait_type, name in jobs]
+        layers = [future.result() for future in tqdm(futures, desc="Validating layers")]
+
+    errors = [error for layer in layers for error in layer["errors"]]
+    warnings = [warning for layer in layers for warning in layer["warnings"]]
+
+    # Files on disk that config.json never references
+    referenced = {layer_key(trait_type, name) for trait_type, name in jobs}
+    for layer_path in sorted(Path(traits_dir).glob("*/*.png")):
+        if layer_key(layer_path.parent.name, layer_path.stem) not in referenced:
+            warnings.append(f"{layer_path} (Not referenced in config)")
+
+    return layers, errors, warnings
+
+
+def write_atlas(layers, atlas_file, traits_dir="traits"):
+    """Pack validated layers into one file: magic, header length, JSON header, aligned pixel blobs"""
+    entries = {}
+    offset = 0
+    for layer in layers:
+        offset = -(-offset // ATLAS_ALIGNMENT) * ATLAS_ALIGNMENT
+        entries[layer_key(layer["trait_type"], layer["name"])] = {
+            "offset": offset,
+            "length": len(layer["pixels"]),
+            "bbox": layer["bbox"],
+            "source": layer["source"],
+        }
+        offset += len(layer["pixels"])
+
+    header = json.dumps({
+        "canvas_size": list(CANVAS_SIZE),
+        "mode": "RGBA",
+        "traits_dir": str(traits_dir),
+        "layers": entries,
+    }).encode()
+    data_start = -(-(len(ATLAS_MAGIC) + 4 + len(header)) // ATLAS_ALIGNMENT) * ATLAS_ALIGNMENT
+
+    temp_file = f"{atlas_file}.tmp"
+    with open(temp_file, 'wb') as f:
+        f.write(ATLAS_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for layer in layers:
+            f.seek(data_start + entries[layer_key(layer["trait_type"], layer["name"])]["offset"])
+            f.write(layer["pixels"])
+        f.truncate(data_start + offset)
+    os.replace(temp_file, atlas_file)
+    return data_start + offset
+
+
+class TraitAtlas:
+    """
+    Read-only view of a compiled atlas.
+
+    The file is memory-mapped, so every process that opens it shares the same
+    page-cache pages and layers are wrapped without decoding or copying.
+    """
+
+    def __init__(self, atlas_file):
+        self.atlas_file = atlas_file
+        with open(atlas_file, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.buffer[:len(ATLAS_MAGIC)] != ATLAS_MAGIC:
+            raise ValueError(f"{atlas_file} is not a trait atlas")
+        header_start = len(ATLAS_MAGIC) + 4
+        (header_length,) = struct.unpack_from("<I", self.buffer, len(ATLAS_MAGIC))
+        header = json.loads(self.buffer[header_start:header_start + header_length])
+
+        self.canvas_size = tuple(header["canvas_size"])
+        self.traits_dir = header.get("traits_dir", "traits")
+        self.layers = header["layers"]
+        self.data_start = -(-(header_start + header_length) // ATLAS_ALIGNMENT) * ATLAS_ALIGNMENT
+        self.view = memoryview(self.buffer)
+
+    def check_config(self, config):
+        """Raise before generation if the atlas is missing layers or older than traits/"""
+        missing = []
+        stale = []
+        for trait_type in config["trait_order"]:
+            for option in config["traits"][trait_type]["options"]:
+                key = layer_key(trait_type, option["name"])
+                if key not in self.layers:
+                    missing.append(key)
+                    continue
+
+                layer_path = Path(self.traits_dir) / trait_type / f"{option['name']}.png"
+                try:
+                    if source_stamp(layer_path) != self.layers[key].get("source"):
+                        stale.append(key)
+                except FileNotFoundError:
+                    stale.append(f"{key} (deleted)")
+
+        if missing:
+            raise ValueError(f"Atlas {self.atlas_file} is missing layers: {', '.join(missing)}. Re-run compile_assets.py")
+        if stale:
+            raise ValueError(f"Atlas {self.atlas_file} is stale, re-run compile_assets.py. Changed layers: {', '.join(stale)}")
+
+    def get_layer(self, trait_type, name):
+        """Return (image, (x, y)) for a layer; the image is None for fully transparent layers"""
+        entry = self.layers[layer_key(trait_type, name)]
+        left, top, right, bottom = entry["bbox"]
+        if entry["length"] == 0:
+            return None, (left, top)
+
+        start = self.data_start + entry["offset"]
+        pixels = self.view[start:start + entry["length"]]
+        image = Image.frombuffer("RGBA", (right - left, bottom - top), pixels, "raw", "RGBA", 0, 1)
+        return image, (left, top)
+
+
+def main():
+    try:
+        config_file = "config.json"
+        traits_dir = "traits"
+        atlas_file = "traits.atlas"
+
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+
+        print(f"Validating {config_file} against {traits_dir}/...")
+        layers, errors, warnings = validate_assets(config, traits_dir)
+
+        if warnings:
+            print("\nWarnings:")
+            for warning in warnings:
+                print(f"- {warning}")
+
+        if errors:
+            print("\nAsset errors found:")
+            for error in errors:
+                print(f"- {error}")
+            raise Exception(f"{len(errors)} asset errors, atlas not written")
+
+        size = write_atlas(layers, atlas_file, traits_dir)
+        print(f"\nPacked {len(layers)} layers into {atlas_file} ({size / 1024 / 1024:.2f} MB)")
+
+    except Exception as e:
+        print(f"\nError: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,13 @@ import random
 from PIL import Image
 import os
 import hashlib
+import io
 from tqdm import tqdm
 from collections import defaultdict, Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from compile_assets import TraitAtlas, CANVAS_SIZE, validate_assets
+from provenance import ProvenanceTracker
+from rarity_traits import RarityTracker, save_trait_rarity, save_nft_rarity
 
 class TraitTracker:
     def __init__(self):
@@ -70,15 +75,25 @@ class NFTGenerator:
         "ffd7d8", "fff6d7"
     ]
 
-    def __init__(self, config_file, ruler_file):
+    def __init__(self, config_file, ruler_file, atlas_file=None):
+        self.config_file = config_file
+        self.ruler_file = ruler_file
+        self.atlas_file = atlas_file
         self.config = self.load_json(config_file)
         self.ruler = self.load_json(ruler_file)
         self.trait_order = self.config["trait_order"]
         self.traits = self.config["traits"]
+        self.atlas = None
+        if atlas_file:
+            # Fail on asset problems before the first token instead of mid-run
+            self.atlas = TraitAtlas(atlas_file)
+            self.atlas.check_config(self.config)
         self.setup_directories()
         self.tracker = TraitTracker()
         self.generated_hashes = set()
         self.failed_attempts = Counter()
+        self.provenance = ProvenanceTracker()
+        self.rarity = RarityTracker()
 
     def setup_directories(self):
         self.output_dir = "output"
@@ -163,15 +178,21 @@ class NFTGenerator:
 
         raise Exception(f"Failed to generate unique NFT after {self.MAX_ATTEMPTS} attempts")
 
-    def save_nft(self, traits, nft_id, nft_hash):
-        # Image generation
-        base_image = Image.new("RGBA", (960, 960), (255, 255, 255, 0))
+    def compose_image(self, traits):
+        """Composite the trait layers of a token into a single RGBA image"""
+        base_image = Image.new("RGBA", CANVAS_SIZE, (255, 255, 255, 0))
         modified_order = (["Base", "Suit", "Mouth", "Head", "Eyes"] 
                          if "Head" in traits and traits["Head"] in self.SPECIAL_TRAITS 
                          else self.trait_order)
 
         for trait_type in modified_order:
             if trait_type in traits:
+                if self.atlas:
+                    layer_image, position = self.atlas.get_layer(trait_type, traits[trait_type])
+                    if layer_image is not None:
+                        base_image.alpha_composite(layer_image, dest=position)
+                    continue
+
                 layer_path = f"traits/{trait_type}/{traits[trait_type]}.png"
                 try:
                     layer_image = Image.open(layer_path)
@@ -180,11 +201,36 @@ class NFTGenerator:
                     print(f"Error loading image {layer_path}: {str(e)}")
                     raise
 
-        base_image.save(f"{self.output_dir}/{nft_id}.png")
+        return base_image
+
+    def encode_image(self, image):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def save_image(self, traits, nft_id):
+        # Image generation, hashed from the encoded bytes so output/ never needs re-reading
+        image_bytes = self.encode_image(self.compose_image(traits))
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        with open(f"{self.output_dir}/{nft_id}.png", 'wb') as f:
+            f.write(image_bytes)
+        return image_hash
+
+    def save_nft(self, traits, nft_id, nft_hash):
+        image_hash = self.save_image(traits, nft_id)
 
         # Get random background color
         background_color = self.get_random_background_color()
+        self.save_metadata(traits, nft_id, background_color)
+        return background_color, image_hash
+
+    def build_attributes(self, traits):
+        return [
+            {"trait_type": trait_type, "value": traits.get(trait_type, "None")}
+            for trait_type in self.trait_order
+        ]
 
+    def save_metadata(self, traits, nft_id, background_color):
         # Thunder/Fuel compatible metadata structure
         metadata = {
             "id": str(nft_id),
@@ -194,46 +240,104 @@ class NFTGenerator:
             "image": f"ipfs://<your-ipfs-cid>/{nft_id}.png",
             "external_url": "https://github.com/koby32px",
             "background_color": background_color,
-            "attributes": [
-                {"trait_type": trait_type, "value": traits.get(trait_type, "None")}
-                for trait_type in self.trait_order
-            ]
+            "attributes": self.build_attributes(traits)
         }
 
         with open(f"{self.metadata_dir}/{nft_id}.json", 'w') as f:
             json.dump(metadata, f, indent=2)
-            
-        return background_color
 
-    def generate_collection(self, num_nfts):
+    def generate_collection(self, num_nfts, workers=1):
         collection = []
         print(f"Generating {num_nfts} NFTs...")
         
         # Track background color distribution
         color_distribution = Counter()
-        
-        for i in tqdm(range(1, num_nfts + 1), desc="Generating NFTs"):
-            try:
-                nft_traits, nft_hash = self.generate_nft(i)
-                background_color = self.save_nft(nft_traits, i, nft_hash)
-                color_distribution[background_color] += 1
-                
-                collection.append({
-                    "id": i,
-                    "image_name": f"{i}.png",
-                    "traits": nft_traits,
-                    "hash": nft_hash,
-                    "background_color": background_color
-                })
-            except Exception as e:
-                print(f"Failed to generate NFT {i}: {str(e)}")
 
+        def record_nft(nft_id, nft_traits, nft_hash, background_color, image_hash):
+            color_distribution[background_color] += 1
+            self.provenance.add(nft_id, image_hash)
+            self.rarity.add(nft_id, self.build_attributes(nft_traits))
+
+            # Live drift from the configured weights, so a skewed run can be stopped early
+            worst = self.rarity.drift(self.config)[0]
+            progress.set_postfix_str(
+                f"max drift {worst['trait_type']}/{worst['value']} {worst['drift']:+.2f}%",
+                refresh=False
+            )
+
+            collection.append({
+                "id": nft_id,
+                "image_name": f"{nft_id}.png",
+                "traits": nft_traits,
+                "hash": nft_hash,
+                "image_hash": image_hash,
+                "background_color": background_color
+            })
+
+        with tqdm(total=num_nfts, desc="Generating NFTs") as progress:
+            if workers > 1:
+                self.render_collection_parallel(num_nfts, workers, record_nft, progress)
+            else:
+                for i in range(1, num_nfts + 1):
+                    try:
+                        nft_traits, nft_hash = self.generate_nft(i)
+                        background_color, image_hash = self.save_nft(nft_traits, i, nft_hash)
+                        record_nft(i, nft_traits, nft_hash, background_color, image_hash)
+                    except Exception as e:
+                        self.provenance.skip(i)
+                        print(f"Failed to generate NFT {i}: {str(e)}")
+                    progress.update(1)
+
+        collection.sort(key=lambda nft: nft["id"])
         self.save_collection_data(collection)
         print(f"Generation complete. Success rate: {len(collection)/num_nfts*100:.2f}%")
         print(f"Failed attempts: {dict(self.failed_attempts)}")
+        print(f"Provenance hash: {self.provenance.provenance_hash()}")
         print("\nBackground color distribution:")
         for color, count in color_distribution.items():
             print(f"#{color}: {count} NFTs ({count/num_nfts*100:.2f}%)")
+        print("\nLargest drift from configured rarity:")
+        for drift in self.rarity.drift(self.config)[:5]:
+            print(f"{drift['trait_type']}: {drift['value']} {drift['actual']:.2f}% "
+                  f"(configured {drift['expected']:.2f}%, {drift['drift']:+.2f}%)")
+
+    def render_collection_parallel(self, num_nfts, workers, record_nft, progress):
+        """Select traits in this process and render PNGs on a process pool"""
+        in_flight = {}
+
+        def finish(futures):
+            for future in futures:
+                nft_id, nft_traits, nft_hash, background_color = in_flight.pop(future)
+                try:
+                    image_hash = future.result()
+                    self.save_metadata(nft_traits, nft_id, background_color)
+                    record_nft(nft_id, nft_traits, nft_hash, background_color, image_hash)
+                except Exception as e:
+                    self.provenance.skip(nft_id)
+                    print(f"Failed to generate NFT {nft_id}: {str(e)}")
+                progress.update(1)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker,
+                                 initargs=(self.config_file, self.ruler_file, self.atlas_file)) as executor:
+            for i in range(1, num_nfts + 1):
+                try:
+                    nft_traits, nft_hash = self.generate_nft(i)
+                except Exception as e:
+                    self.provenance.skip(i)
+                    print(f"Failed to generate NFT {i}: {str(e)}")
+                    progress.update(1)
+                    continue
+
+                background_color = self.get_random_background_color()
+                future = executor.submit(render_worker, nft_traits, i)
+                in_flight[future] = (i, nft_traits, nft_hash, background_color)
+
+                # Bound queued work so trait selection does not run far ahead of rendering
+                if len(in_flight) >= workers * 4:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    finish(done)
+
+            finish(list(in_flight))
 
     def save_collection_data(self, collection):
         with open(f"{self.output_dir}/collection_metadata.json", 'w') as f:
@@ -249,11 +353,45 @@ class NFTGenerator:
         with open(f"{self.output_dir}/collection_stats.json", 'w') as f:
             json.dump(stats, f, indent=2)
 
+        with open(f"{self.output_dir}/provenance.json", 'w') as f:
+            json.dump(self.provenance.summary(), f, indent=2)
+
+        # Rarity reports from the running counts, no reload of the metadata
+        if self.rarity.total_nfts:
+            trait_rarity = self.rarity.trait_rarity()
+            save_trait_rarity(trait_rarity, f"{self.output_dir}/trait_rarity.csv")
+            save_nft_rarity(self.rarity.nft_rarity_scores(trait_rarity), f"{self.output_dir}/nft_rarity_ranking.csv")
+
+_render_generator = None
+
+def init_render_worker(config_file, ruler_file, atlas_file):
+    """Process-pool initializer: each worker maps the shared atlas once"""
+    global _render_generator
+    _render_generator = NFTGenerator(config_file, ruler_file, atlas_file)
+
+def render_worker(traits, nft_id):
+    return _render_generator.save_image(traits, nft_id)
+
 def main():
     print("Initializing NFT Generator...")
-    generator = NFTGenerator("config.json", "ruler.json")
+    # Build with compile_assets.py; without it layers are decoded from traits/ per token
+    atlas_file = "traits.atlas" if os.path.exists("traits.atlas") else None
+    generator = NFTGenerator("config.json", "ruler.json", atlas_file)
     num_nfts = 3200
-    generator.generate_collection(num_nfts)
+
+    if atlas_file:
+        workers = os.cpu_count() or 1
+    else:
+        # No compiled atlas: check traits/ up front and render in-process
+        _, errors, _ = validate_assets(generator.config)
+        if errors:
+            print("Asset errors found, run compile_assets.py for details:")
+            for error in errors:
+                print(f"- {error}")
+            return
+        workers = 1
+
+    generator.generate_collection(num_nfts, workers)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
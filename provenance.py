@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tqdm import tqdm
+
+
+class ProvenanceTracker:
+    """
+    Fold image digests into a provenance hash and Merkle root as tokens finish.
+
+    Digests may arrive in any order (parallel rendering); they are buffered until
+    the next token in sequence is available and then folded in, so only the
+    out-of-order window and one subtree per tree level are kept in memory.
+    """
+
+    def __init__(self, first_index=1):
+        self.next_index = first_index
+        self.pending = {}
+        self.subtrees = []
+        self.leaf_count = 0
+        self.sequence_hash = hashlib.sha256()
+
+    def add(self, index, digest):
+        """Record the hex SHA-256 digest of token `index`'s image"""
+        self.pending[index] = digest
+        self._advance()
+
+    def skip(self, index):
+        """Mark token `index` as failed so later tokens are not held back"""
+        self.pending[index] = None
+        self._advance()
+
+    def _advance(self):
+        while self.next_index in self.pending:
+            digest = self.pending.pop(self.next_index)
+            self.next_index += 1
+            if digest is not None:
+                self._fold(digest)
+
+    def _fold(self, digest):
+        self.sequence_hash.update(digest.encode())
+        node, height = bytes.fromhex(digest), 0
+        # Merge equal-height subtrees like a binary counter
+        while self.subtrees and self.subtrees[-1][0] == height:
+            _, left = self.subtrees.pop()
+            node, height = hashlib.sha256(left + node).digest(), height + 1
+        self.subtrees.append((height, node))
+        self.leaf_count += 1
+
+    def merkle_root(self):
+        if self.pending:
+            raise ValueError(f"Missing image digest for token {self.next_index}")
+        if not self.subtrees:
+            return None
+
+        # Bag the remaining subtrees right to left; odd nodes are promoted, not duplicated
+        root = self.subtrees[-1][1]
+        for _, left in reversed(self.subtrees[:-1]):
+            root = hashlib.sha256(left + root).digest()
+        return root.hex()
+
+    def provenance_hash(self):
+        """SHA-256 over the concatenated image digests in token order"""
+        if self.pending:
+            raise ValueError(f"Missing image digest for token {self.next_index}")
+        return self.sequence_hash.hexdigest()
+
+    def summary(self):
+        return {
+            "algorithm": "sha256",
+            "total_images": self.leaf_count,
+            "provenance_hash": self.provenance_hash(),
+            "merkle_root": self.merkle_root(),
+        }
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_output(output_dir, workers=None):
+    """Re-hash every image in output_dir and compare against the recorded provenance"""
+    output_path = Path(output_dir)
+    with open(output_path / "collection_metadata.json", 'r') as f:
+        collection = json.load(f)
+    with open(output_path / "provenance.json", 'r') as f:
+        expected = json.load(f)
+
+    collection.sort(key=lambda nft: nft["id"])
+    paths = [output_path / nft["image_name"] for nft in collection]
+    workers = workers or min(32, (os.cpu_count() or 1) * 2)
+
+    def safe_hash(path):
+        try:
+            return hash_file(path)
+        except FileNotFoundError:
+            return None
+
+    # hashlib and file reads release the GIL, so threads hash in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        digests = list(tqdm(executor.map(safe_hash, paths), total=len(paths), desc="Hashing images"))
+
+    tracker = ProvenanceTracker(first_index=0)
+    problems = []
+    for index, (nft, digest) in enumerate(zip(collection, digests)):
+        if digest is None:
+            problems.append(f"{nft['image_name']} (Missing)")
+            digest = nft.get("image_hash")
+        elif nft.get("image_hash") != digest:
+            problems.append(f"{nft['image_name']} (Digest mismatch)")
+        if digest is None:
+            tracker.skip(index)
+        else:
+            tracker.add(index, digest)
+
+    actual = tracker.summary()
+    for key in ("provenance_hash", "merkle_root"):
+        if actual[key] != expected.get(key):
+            problems.append(f"{key} mismatch (expected {expected.get(key)}, got {actual[key]})")
+
+    return actual, problems
+
+
+def main():
+    try:
+        output_dir = "output"
+        print(f"Verifying image provenance in {output_dir}...")
+        actual, problems = verify_output(output_dir)
+
+        print(f"\nImages hashed: {actual['total_images']}")
+        print(f"Provenance hash: {actual['provenance_hash']}")
+        print(f"Merkle root: {actual['merkle_root']}")
+
+        if problems:
+            print("\nVerification FAILED:")
+            for problem in problems:
+                print(f"- {problem}")
+        else:
+            print("\nVerification passed!")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -12,59 +12,111 @@ def load_metadata(file_path):
     except Exception as e:
         raise Exception(f"Error loading metadata: {str(e)}")
 
+def configured_percentages(config):
+    """Expected percentage of every trait value implied by config.json weights"""
+    expected = {}
+    for trait_type in config['trait_order']:
+        trait_config = config['traits'][trait_type]
+        include_pct = min(trait_config['rarity'], 100)
+        total_weight = sum(option['rarity'] for option in trait_config['options'])
+
+        values = defaultdict(float)
+        values['None'] = 100 - include_pct
+        for option in trait_config['options']:
+            values[option['name']] += include_pct * option['rarity'] / total_weight
+        expected[trait_type] = dict(values)
+    return expected
+
+class RarityTracker:
+    """Running trait counts and rarity scores, updated as each NFT is accepted"""
+
+    def __init__(self):
+        self.total_nfts = 0
+        self.trait_counts = defaultdict(lambda: defaultdict(int))
+        self.nft_attributes = []
+
+    def add(self, nft_id, attributes):
+        self.total_nfts += 1
+        for trait in attributes:
+            self.trait_counts[trait['trait_type']][trait['value']] += 1
+        self.nft_attributes.append((nft_id, attributes))
+
+    def trait_rarity(self):
+        trait_rarity = {}
+        for trait_type, values in self.trait_counts.items():
+            trait_rarity[trait_type] = {}
+            for value, count in values.items():
+                rarity_score = 1 / (count / self.total_nfts)
+                trait_rarity[trait_type][value] = {
+                    'count': count,
+                    'percentage': (count / self.total_nfts) * 100,
+                    'rarity_score': rarity_score
+                }
+        return trait_rarity
+
+    def nft_rarity_scores(self, trait_rarity=None):
+        trait_rarity = trait_rarity or self.trait_rarity()
+        nft_rarity_scores = []
+
+        for nft_id, attributes in self.nft_attributes:
+            nft_score = 0
+            traits_info = []
+
+            for trait in attributes:
+                trait_type = trait['trait_type']
+                trait_value = trait['value']
+                rarity_info = trait_rarity[trait_type][trait_value]
+
+                nft_score += rarity_info['rarity_score']
+                traits_info.append({
+                    'trait_type': trait_type,
+                    'value': trait_value,
+                    'count': rarity_info['count'],
+                    'percentage': rarity_info['percentage'],
+                    'rarity_score': rarity_info['rarity_score']
+                })
+
+            nft_rarity_scores.append({
+                'id': nft_id,
+                'traits': traits_info,
+                'total_score': nft_score
+            })
+
+        return sorted(nft_rarity_scores, key=lambda x: x['total_score'], reverse=True)
+
+    def drift(self, config):
+        """Actual vs configured percentage for every trait value, biggest drift first"""
+        drift = []
+        for trait_type, expected in configured_percentages(config).items():
+            for value, expected_pct in expected.items():
+                count = self.trait_counts[trait_type].get(value, 0)
+                actual_pct = count / self.total_nfts * 100 if self.total_nfts else 0
+                if count or expected_pct:
+                    drift.append({
+                        'trait_type': trait_type,
+                        'value': value,
+                        'actual': actual_pct,
+                        'expected': expected_pct,
+                        'drift': actual_pct - expected_pct
+                    })
+
+        return sorted(drift, key=lambda x: abs(x['drift']), reverse=True)
+
 def calculate_trait_rarity(metadata):
     """Calculate rarity for each trait and value"""
-    total_nfts = len(metadata)
-    trait_counts = defaultdict(lambda: defaultdict(int))
-    nft_rarity_scores = []
+    tracker = RarityTracker()
 
     # Count occurrences of each trait value
     print("Counting trait occurrences...")
     for nft in metadata:
-        for trait in nft['attributes']:
-            trait_type = trait['trait_type']
-            trait_value = trait['value']
-            trait_counts[trait_type][trait_value] += 1
+        tracker.add(nft['id'], nft['attributes'])
 
     # Calculate rarity scores
-    trait_rarity = {}
-    for trait_type, values in trait_counts.items():
-        trait_rarity[trait_type] = {}
-        for value, count in values.items():
-            rarity_score = 1 / (count / total_nfts)
-            trait_rarity[trait_type][value] = {
-                'count': count,
-                'percentage': (count / total_nfts) * 100,
-                'rarity_score': rarity_score
-            }
+    trait_rarity = tracker.trait_rarity()
 
     # Calculate rarity score for each NFT
     print("\nCalculating NFT rarity scores...")
-    for nft in metadata:
-        nft_score = 0
-        traits_info = []
-
-        for trait in nft['attributes']:
-            trait_type = trait['trait_type']
-            trait_value = trait['value']
-            rarity_info = trait_rarity[trait_type][trait_value]
-            
-            nft_score += rarity_info['rarity_score']
-            traits_info.append({
-                'trait_type': trait_type,
-                'value': trait_value,
-                'count': rarity_info['count'],
-                'percentage': rarity_info['percentage'],
-                'rarity_score': rarity_info['rarity_score']
-            })
-
-        nft_rarity_scores.append({
-            'id': nft['id'],
-            'traits': traits_info,
-            'total_score': nft_score
-        })
-
-    return trait_rarity, sorted(nft_rarity_scores, key=lambda x: x['total_score'], reverse=True)
+    return trait_rarity, tracker.nft_rarity_scores(trait_rarity)
 
 def save_trait_rarity(trait_rarity, output_file):
     """Save trait rarity analysis to CSV"""
@@ -0,0 +1,298 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate
+
+from main import NFTGenerator
+
+STATUS_TEXT = {
+    200: "OK",
+    206: "Partial Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    416: "Range Not Satisfiable",
+    500: "Internal Server Error",
+}
+
+METADATA_ROUTE = re.compile(r"^/metadata/(\d+)(?:\.json)?$")
+IMAGE_ROUTE = re.compile(r"^/(?:images/)?(\d+)\.png$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ResponseCache:
+    """Byte-bounded LRU of response bodies keyed by request path"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, stamp):
+        entry = self.entries.get(key)
+        if entry is None or entry["stamp"] != stamp:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, stamp, body, content_type):
+        entry = {
+            "stamp": stamp,
+            "body": body,
+            "etag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            "content_type": content_type,
+        }
+        if len(body) > self.max_bytes:
+            return entry
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= len(old["body"])
+        self.entries[key] = entry
+        self.current_bytes += len(body)
+
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.current_bytes -= len(evicted["body"])
+        return entry
+
+
+class OutputServer:
+    """Serve token metadata and images from the generator output folder"""
+
+    def __init__(self, generator, host="127.0.0.1", port=8080, cache_bytes=256 * 1024 * 1024):
+        self.generator = generator
+        self.host = host
+        self.port = port
+        self.output_dir = generator.output_dir
+        self.metadata_dir = generator.metadata_dir
+        self.cache = ResponseCache(cache_bytes)
+        self.pending_renders = {}
+
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def file_stamp(self, path):
+        """Cheap change detector so edited files (e.g. after a CID update) are re-read"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read_metadata(self, path):
+        with open(path, 'r') as f:
+            metadata = json.load(f)
+        # Point the staging marketplace at this server instead of the IPFS placeholder
+        metadata["image"] = f"{self.base_url()}/{metadata['id']}.png"
+        return json.dumps(metadata, separators=(",", ":")).encode()
+
+    def read_file(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def render_image(self, nft_id):
+        """Render a token whose metadata exists but whose PNG is not on disk yet"""
+        metadata_path = os.path.join(self.metadata_dir, f"{nft_id}.json")
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+
+        traits = OrderedDict(
+            (attr["trait_type"], attr["value"])
+            for attr in metadata["attributes"]
+            if attr["value"] != "None"
+        )
+        body = self.generator.encode_image(self.generator.compose_image(traits))
+
+        image_path = os.path.join(self.output_dir, f"{nft_id}.png")
+        temp_path = f"{image_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(body)
+        os.replace(temp_path, image_path)
+        return body
+
+    async def load_metadata(self, nft_id):
+        path = os.path.join(self.metadata_dir, f"{nft_id}.json")
+        stamp = self.file_stamp(path)
+        if stamp is None:
+            return None
+
+        entry = self.cache.get(path, stamp)
+        if entry is None:
+            body = await asyncio.to_thread(self.read_metadata, path)
+            entry = self.cache.put(path, stamp, body, "application/json")
+        return entry
+
+    async def load_image(self, nft_id):
+        path = os.path.join(self.output_dir, f"{nft_id}.png")
+        stamp = self.file_stamp(path)
+        if stamp is not None:
+            entry = self.cache.get(path, stamp)
+            if entry is None:
+                body = await asyncio.to_thread(self.read_file, path)
+                entry = self.cache.put(path, stamp, body, "image/png")
+            return entry
+
+        if not os.path.exists(os.path.join(self.metadata_dir, f"{nft_id}.json")):
+            return None
+
+        # Concurrent requests for the same missing token share one render
+        render = self.pending_renders.get(nft_id)
+        if render is None:
+            render = asyncio.ensure_future(asyncio.to_thread(self.render_image, nft_id))
+            self.pending_renders[nft_id] = render
+            render.add_done_callback(lambda _: self.pending_renders.pop(nft_id, None))
+        body = await render
+        return self.cache.put(path, self.file_stamp(path), body, "image/png")
+
+    def parse_range(self, header, size):
+        """Parse a single byte range; returns (start, end), None for full body or 'invalid'"""
+        match = RANGE_HEADER.match(header.strip())
+        if not match:
+            # Multi-range and other units are not supported, fall back to the full body
+            return None
+
+        start, end = match.groups()
+        if not start and not end:
+            return "invalid"
+        if not start:
+            length = int(end)
+            if length == 0:
+                return "invalid"
+            return max(size - length, 0), size - 1
+
+        start = int(start)
+        end = int(end) if end else size - 1
+        if start >= size or end < start:
+            return "invalid"
+        return start, min(end, size - 1)
+
+    async def handle_request(self, method, path, headers):
+        """Build (status, headers, body) for a single request"""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+
+        path = path.split("?", 1)[0]
+        metadata_match = METADATA_ROUTE.match(path)
+        image_match = IMAGE_ROUTE.match(path)
+
+        if metadata_match:
+            entry = await self.load_metadata(int(metadata_match.group(1)))
+        elif image_match:
+            entry = await self.load_image(int(image_match.group(1)))
+        else:
+            entry = None
+
+        if entry is None:
+            return 404, {"Content-Type": "text/plain"}, b"Not Found"
+
+        response_headers = {
+            "Content-Type": entry["content_type"],
+            "ETag": entry["etag"],
+            "Cache-Control": "no-cache",
+            "Accept-Ranges": "bytes",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or entry["etag"] in if_none_match):
+            return 304, response_headers, b""
+
+        body = entry["body"]
+        range_header = headers.get("range")
+        if_range = headers.get("if-range")
+        if range_header and (not if_range or if_range.strip() == entry["etag"]):
+            byte_range = self.parse_range(range_header, len(body))
+            if byte_range == "invalid":
+                response_headers["Content-Range"] = f"bytes */{len(body)}"
+                return 416, response_headers, b""
+            if byte_range is not None:
+                start, end = byte_range
+                response_headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                return 206, response_headers, body[start:end + 1]
+
+        return 200, response_headers, body
+
+    async def read_headers(self, reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                parts = request_line.decode("latin-1").split()
+                headers = await self.read_headers(reader)
+                if len(parts) != 3:
+                    status, response_headers, body = 400, {"Content-Type": "text/plain"}, b"Bad Request"
+                    method, version = "GET", "HTTP/1.0"
+                else:
+                    method, path, version = parts
+                    try:
+                        status, response_headers, body = await self.handle_request(method, path, headers)
+                    except Exception as e:
+                        print(f"Error serving {path}: {str(e)}")
+                        status, response_headers, body = 500, {"Content-Type": "text/plain"}, b"Internal Server Error"
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = (connection != "close") if version == "HTTP/1.1" else (connection == "keep-alive")
+
+                # A 304 has no body; a Content-Length of 0 would be read as the new representation size
+                if status != 304:
+                    response_headers["Content-Length"] = str(len(body))
+                response_headers["Date"] = formatdate(usegmt=True)
+                response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+
+                head = f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                head += "".join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+                writer.write(head.encode("latin-1") + b"\r\n")
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"Serving {self.output_dir} at {self.base_url()}")
+        print(f"Metadata: {self.base_url()}/metadata/<id>.json  Images: {self.base_url()}/<id>.png")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    host = "127.0.0.1"
+    port = 8080
+    cache_bytes = 256 * 1024 * 1024
+
+    try:
+        generator = NFTGenerator("config.json", "ruler.json")
+        server = OutputServer(generator, host, port, cache_bytes)
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+    except Exception as e:
+        print(f"Error: {str(e)}")
+
+if __name__ == "__main__":
+    main()
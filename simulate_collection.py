@@ -0,0 +1,302 @@
+import json
+import os
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from tqdm import tqdm
+
+from main import NFTGenerator, TraitTracker
+from rarity_traits import configured_percentages
+
+
+class CollectionSimulator:
+    """
+    Dry run of NFTGenerator.generate_collection that never renders an image.
+
+    Candidate trait sets are drawn in NumPy batches with the ruler applied as
+    precomputed conflict matrices; only the stateful TraitTracker / duplicate
+    check walks the candidates one by one, exactly as generate_nft does.
+
+    Failed attempts are split into trait_validation, uniqueness and duplicate,
+    each counted once. NFTGenerator.failed_attempts counts a trait_validation
+    failure under uniqueness as well and never counts duplicates, so these
+    rates are not directly comparable with collection_stats.json.
+    """
+
+    PRIORITY_TRAITS = ['Base', 'Suit', 'Head']
+
+    def __init__(self, config, ruler, batch_size=4096, max_consecutive_failures=None):
+        self.config = config
+        self.ruler = ruler
+        self.batch_size = batch_size
+        self.max_consecutive_failures = max_consecutive_failures
+
+        trait_order = config["trait_order"]
+        remaining_traits = [t for t in trait_order if t not in self.PRIORITY_TRAITS]
+        self.generation_order = self.PRIORITY_TRAITS + remaining_traits
+
+        self.names = {}
+        self.cumulative = {}
+        self.include_pct = {}
+        for trait_type in self.generation_order:
+            options = config["traits"][trait_type]["options"]
+            self.names[trait_type] = [option["name"] for option in options]
+            self.cumulative[trait_type] = np.cumsum([option["rarity"] for option in options])
+            self.include_pct[trait_type] = config["traits"][trait_type]["rarity"]
+
+        self.conflicts = self.build_conflicts()
+
+    def build_conflicts(self):
+        """Boolean (new value, existing value) matrices equivalent to NFTGenerator.is_valid_trait"""
+        conflicts = {}
+        for rule in self.ruler["rules"]:
+            if_type = rule["if"]["trait_type"]
+            then_type = rule["then"]["trait_type"]
+            if if_type not in self.names or then_type not in self.names:
+                continue
+
+            excluded_values = rule["then"]["excluded_values"]
+            if_mask = np.array([name in rule["if"]["value"] for name in self.names[if_type]])
+            then_mask = np.array([
+                "all" in excluded_values or name in excluded_values
+                for name in self.names[then_type]
+            ])
+            pair_conflict = np.outer(if_mask, then_mask)
+
+            # Rules apply whichever of the two traits is picked first
+            for key, matrix in (((if_type, then_type), pair_conflict), ((then_type, if_type), pair_conflict.T)):
+                conflicts[key] = conflicts[key] | matrix if key in conflicts else matrix
+        return conflicts
+
+    def sample_candidates(self, rng, count):
+        """Draw `count` generate_nft attempts; returns value indices (-1 = absent) and a validity mask"""
+        choices = np.full((count, len(self.generation_order)), -1, dtype=np.int32)
+        valid = np.ones(count, dtype=bool)
+
+        for column, trait_type in enumerate(self.generation_order):
+            included = rng.random(count) * 100 < self.include_pct[trait_type]
+            rows = np.flatnonzero(included & valid)
+            cumulative = self.cumulative[trait_type]
+            pending = np.arange(len(rows))
+            picked = np.full(len(rows), -1, dtype=np.int32)
+
+            for _ in range(NFTGenerator.MAX_TRAIT_ATTEMPTS):
+                if not len(pending):
+                    break
+                draws = np.searchsorted(cumulative, rng.random(len(pending)) * cumulative[-1])
+                draws = np.minimum(draws, len(cumulative) - 1)
+
+                allowed = np.ones(len(pending), dtype=bool)
+                for previous_column, previous_type in enumerate(self.generation_order[:column]):
+                    matrix = self.conflicts.get((trait_type, previous_type))
+                    if matrix is None:
+                        continue
+                    previous = choices[rows[pending], previous_column]
+                    allowed &= ~((previous >= 0) & matrix[draws, np.maximum(previous, 0)])
+
+                picked[pending[allowed]] = draws[allowed]
+                pending = pending[~allowed]
+
+            choices[rows, column] = picked
+            valid[rows[pending]] = False
+
+        return choices, valid
+
+    def to_traits(self, row):
+        return OrderedDict(
+            (trait_type, self.names[trait_type][value])
+            for trait_type, value in zip(self.generation_order, row)
+            if value >= 0
+        )
+
+    def simulate(self, num_nfts, seed):
+        """Simulate one collection; mirrors generate_collection's per-token MAX_ATTEMPTS loop"""
+        rng = np.random.default_rng(seed)
+        tracker = TraitTracker()
+        generated = set()
+        failures = Counter()
+        trait_counts = defaultdict(Counter)
+
+        accepted = 0
+        total_attempts = 0
+        first_failure_at = None
+        stopped_at = None
+        consecutive_failures = 0
+        choices, valid = self.sample_candidates(rng, self.batch_size)
+        cursor = 0
+
+        token = 1
+        while token <= num_nfts:
+            for _ in range(NFTGenerator.MAX_ATTEMPTS):
+                if cursor == len(valid):
+                    choices, valid = self.sample_candidates(rng, self.batch_size)
+                    cursor = 0
+                row, is_valid = choices[cursor], valid[cursor]
+                cursor += 1
+                total_attempts += 1
+
+                if not is_valid:
+                    failures['trait_validation'] += 1
+                    continue
+                traits = self.to_traits(row)
+                if not tracker.is_unique_enough(traits):
+                    failures['uniqueness'] += 1
+                    continue
+                key = tuple(row)
+                if key in generated:
+                    failures['duplicate'] += 1
+                    continue
+
+                generated.add(key)
+                tracker.update_patterns(traits)
+                for trait_type in self.config["trait_order"]:
+                    trait_counts[trait_type][traits.get(trait_type, "None")] += 1
+                accepted += 1
+                consecutive_failures = 0
+                break
+            else:
+                if first_failure_at is None:
+                    first_failure_at = token
+                consecutive_failures += 1
+                # Opt-in shortcut: once the space is exhausted every further token burns
+                # MAX_ATTEMPTS, so stop and count the rest of the seed as failed
+                if self.max_consecutive_failures and consecutive_failures >= self.max_consecutive_failures:
+                    stopped_at = token
+                    break
+            token += 1
+
+        return {
+            "seed": seed,
+            "accepted": accepted,
+            "attempts": total_attempts,
+            "failures": dict(failures),
+            "first_failure_at": first_failure_at,
+            "stopped_at": stopped_at,
+            "trait_counts": {trait_type: dict(values) for trait_type, values in trait_counts.items()},
+        }
+
+
+def run_seed(config, ruler, num_nfts, seed, max_consecutive_failures=None):
+    simulator = CollectionSimulator(config, ruler, max_consecutive_failures=max_consecutive_failures)
+    return simulator.simulate(num_nfts, seed)
+
+
+def summarize(config, num_nfts, results):
+    """Average per-seed results into success, failure and distribution figures"""
+    expected = configured_percentages(config)
+    total_attempts = sum(result["attempts"] for result in results)
+    failure_types = sorted({name for result in results for name in result["failures"]})
+    first_failures = [result["first_failure_at"] for result in results if result["first_failure_at"]]
+    truncated = [
+        {"seed": result["seed"], "stopped_at": result["stopped_at"]}
+        for result in results if result["stopped_at"]
+    ]
+
+    distribution = []
+    for trait_type, values in expected.items():
+        observed = {value for result in results for value in result["trait_counts"].get(trait_type, {})}
+        for value in sorted(set(values) | observed):
+            percentages = np.array([
+                result["trait_counts"].get(trait_type, {}).get(value, 0) / max(result["accepted"], 1) * 100
+                for result in results
+            ])
+            expected_pct = values.get(value, 0)
+            if not expected_pct and not percentages.any():
+                continue
+            distribution.append({
+                "trait_type": trait_type,
+                "value": value,
+                "expected": expected_pct,
+                "mean": float(percentages.mean()),
+                "std": float(percentages.std()),
+                "drift": float(percentages.mean() - expected_pct),
+            })
+
+    return {
+        "num_nfts": num_nfts,
+        "seeds": len(results),
+        "success_rate": float(np.mean([result["accepted"] / num_nfts * 100 for result in results])),
+        "min_success_rate": float(min(result["accepted"] / num_nfts * 100 for result in results)),
+        "failure_rates_note": (
+            "Each failed attempt is counted once as trait_validation, uniqueness or duplicate; "
+            "collection_stats.json counts trait_validation failures under uniqueness too and omits duplicates"
+        ),
+        "failure_rates": {
+            name: sum(result["failures"].get(name, 0) for result in results) / total_attempts * 100
+            for name in failure_types
+        },
+        "seeds_with_failures": len(first_failures),
+        "first_failure_at": {
+            "min": min(first_failures),
+            "mean": float(np.mean(first_failures)),
+        } if first_failures else None,
+        # Seeds stopped by max_consecutive_failures: remaining tokens were counted as failed,
+        # and the success and failure rates above describe those truncated runs
+        "truncated_seeds": truncated,
+        "distribution": sorted(distribution, key=lambda x: abs(x["drift"]), reverse=True),
+    }
+
+
+def simulate_collection(config, ruler, num_nfts, seeds, workers=None, max_consecutive_failures=None):
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_seed, config, ruler, num_nfts, seed, max_consecutive_failures)
+            for seed in seeds
+        ]
+        results = [future.result() for future in tqdm(futures, desc="Simulating seeds")]
+    return summarize(config, num_nfts, results)
+
+
+def main():
+    try:
+        config_file = "config.json"
+        ruler_file = "ruler.json"
+        num_nfts = 3200
+        seeds = range(32)
+        output_file = "simulation_report.json"
+        # Set e.g. 5 to stop a seed once saturated; faster, but the rates then describe a truncated run
+        max_consecutive_failures = None
+
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+        with open(ruler_file, 'r') as f:
+            ruler = json.load(f)
+
+        print(f"Simulating {num_nfts} NFTs across {len(seeds)} seeds (no images rendered)...")
+        report = simulate_collection(config, ruler, num_nfts, seeds,
+                                     max_consecutive_failures=max_consecutive_failures)
+
+        print("\n=== Simulation Summary ===")
+        print(f"Expected success rate: {report['success_rate']:.2f}% (worst seed {report['min_success_rate']:.2f}%)")
+        print("Failure rate per attempt (not comparable with collection_stats.json categories):")
+        for name, rate in report["failure_rates"].items():
+            print(f"  {name}: {rate:.2f}%")
+
+        if report["first_failure_at"]:
+            print(f"MAX_ATTEMPTS failures start at NFT #{report['first_failure_at']['min']} "
+                  f"(mean #{report['first_failure_at']['mean']:.0f}, "
+                  f"{report['seeds_with_failures']}/{report['seeds']} seeds)")
+        else:
+            print(f"No MAX_ATTEMPTS failures up to {num_nfts} NFTs")
+
+        if report["truncated_seeds"]:
+            print(f"Warning: {len(report['truncated_seeds'])}/{report['seeds']} seeds were stopped early "
+                  f"after {max_consecutive_failures} consecutive failures; rates above cover truncated runs")
+            for truncated in report["truncated_seeds"]:
+                print(f"  seed {truncated['seed']}: stopped at NFT #{truncated['stopped_at']}")
+
+        print("\nLargest drift from configured rarity:")
+        for trait in report["distribution"][:10]:
+            print(f"{trait['trait_type']}: {trait['value']} {trait['mean']:.2f}% ± {trait['std']:.2f} "
+                  f"(configured {trait['expected']:.2f}%, {trait['drift']:+.2f}%)")
+
+        with open(output_file, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nDetailed report saved to {output_file}")
+
+    except Exception as e:
+        print(f"\nError: {str(e)}")
+
+if __name__ == "__main__":
+    main()